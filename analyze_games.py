@@ -0,0 +1,148 @@
+"""Re-search every position of recorded games and flag blunders.
+
+For each move of each game, the position before the move is searched at a
+fixed depth. The score of the best move is compared with the score of the
+move that was played, both from the mover's point of view. Moves that lose
+more than the threshold are reported as blunders.
+
+Won and lost positions score +WIN and -WIN rather than the heuristic's value,
+so a move that lets the opponent win within the search depth is always a
+blunder when a better move exists.
+"""
+import argparse
+import json
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from breakthrough_const import WHITE
+from breakthrough_engine import Breakthrough, HEURISTICS, move_to_str, parse_move
+from breakthrough_engine import alpha_beta_scored_search
+from breakthrough_record import read_games
+
+
+GAME = Breakthrough()
+
+# Larger than any heuristic score.
+WIN = 10000
+
+
+def with_wins(eval_fn):
+    """Wrap a heuristic so that finished games score +WIN or -WIN."""
+    def evaluate(state, player):
+        utility = GAME.utility(state, player)
+        if utility != 0:
+            return utility * WIN
+        return eval_fn(state, player)
+    return evaluate
+
+
+def replay(moves):
+    """Return the (state, move) pairs of a game given as move strings."""
+    state = GAME.initial
+    positions = []
+    for text in moves:
+        move = parse_move(text)
+        if move not in GAME.actions(state):
+            raise ValueError("illegal move {} at ply {}".format(text, len(positions) + 1))
+        positions.append((state, move))
+        state = GAME.result(state, move)
+    return positions
+
+
+def analyze_position(task):
+    """
+    Search one position and score the move that was played.
+
+    :param task: A (state, played move, depth, heuristic name, seed) tuple.
+    :return: The best move, its score, the played move's score and the nodes
+        expanded.
+    """
+    state, played, depth, eval_name, seed = task
+    eval_fn = with_wins(HEURISTICS[eval_name])
+    random.seed(seed)
+    best, best_score, nodes = alpha_beta_scored_search(GAME, state, depth, eval_fn=eval_fn)
+    if played == best:
+        return best, best_score, best_score, nodes
+    random.seed(seed)
+    _, played_score, played_nodes = alpha_beta_scored_search(
+        GAME, state, depth, eval_fn=eval_fn, actions=[played]
+    )
+    return best, best_score, played_score, nodes + played_nodes
+
+
+def analyze_games(records, depth=3, eval_name="offensive_heuristic_2", threshold=4.0,
+                  workers=None, seed=0):
+    """
+    Analyze recorded games, searching all their positions in parallel.
+
+    :param records: Game dicts as yielded by breakthrough_record.read_games.
+    :param depth: The search depth for every position.
+    :param eval_name: The name of the heuristic to search with.
+    :param threshold: The score drop above which a move is a blunder.
+    :param workers: The number of worker processes (defaults to the CPU count).
+    :param seed: The random seed of the heuristics' noise.
+    :return: One dict per game with its headers and the blunders found.
+    """
+    games = [(record, replay(record["moves"])) for record in records]
+    tasks = [
+        (state, move, depth, eval_name, seed + ply)
+        for _, positions in games
+        for ply, (state, move) in enumerate(positions)
+    ]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = iter(pool.map(analyze_position, tasks, chunksize=8))
+
+    analyses = []
+    for record, positions in games:
+        blunders = []
+        for ply, (state, move) in enumerate(positions, 1):
+            best, best_score, played_score, _ = next(results)
+            if best_score - played_score > threshold:
+                blunders.append({
+                    "ply": ply,
+                    "side": "white" if state.to_move == WHITE else "black",
+                    "move": record["moves"][ply - 1],
+                    "score": played_score,
+                    "best": move_to_str(best, GAME.is_capture(state, best)),
+                    "best_score": best_score,
+                })
+        analyses.append(dict(
+            {k: v for k, v in record.items() if k != "moves"}, blunders=blunders
+        ))
+    return analyses
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flag blunders in recorded games.")
+    parser.add_argument("records", help="game record file")
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--eval", default="offensive_heuristic_2", choices=sorted(HEURISTICS))
+    parser.add_argument("--threshold", type=float, default=4.0, help="score drop of a blunder")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="also write the analysis as JSON")
+    args = parser.parse_args()
+
+    analyses = analyze_games(
+        read_games(args.records),
+        depth=args.depth,
+        eval_name=args.eval,
+        threshold=args.threshold,
+        workers=args.workers,
+        seed=args.seed,
+    )
+    for i, analysis in enumerate(analyses, 1):
+        print("Game {}: {} vs {}, {}, {} moves, {} blunders".format(
+            i, analysis.get("White"), analysis.get("Black"), analysis.get("Result"),
+            analysis.get("Moves"), len(analysis["blunders"]),
+        ))
+        for b in analysis["blunders"]:
+            print("  ply {ply} {side} {move}: {score:.1f}, best {best} {best_score:.1f}".format(**b))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(analyses, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import argparse
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from breakthrough_engine import Breakthrough, offensive_heuristic_2
+from breakthrough_engine import alpha_beta_cutoff_search
+
+
+def random_states(game, n, seed=0):
+    """Collect n states from random playouts."""
+    rng = random.Random(seed)
+    states = []
+    while len(states) < n:
+        state = game.initial
+        while not game.terminal_test(state) and len(states) < n:
+            state = game.result(state, rng.choice(game.actions(state)))
+            states.append(state)
+    return states
+
+
+def bench_memory(args):
+    """Measure the memory retained per game state."""
+    game = Breakthrough()
+    tracemalloc.start()
+    states = random_states(game, args.states, args.seed)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print("{} states, {:.1f} bytes per state".format(len(states), current / len(states)))
+    print("sys.getsizeof(state) + board: {} bytes".format(
+        sys.getsizeof(states[-1]) + sys.getsizeof(states[-1].board)
+    ))
+
+
+def bench_search(args):
+    """Time alpha-beta searches from a fixed set of positions."""
+    game = Breakthrough()
+    states = random_states(game, args.states, args.seed)[:: max(args.states // 20, 1)]
+    random.seed(args.seed)
+    nodes = 0
+    t0 = time.perf_counter()
+    for state in states:
+        if game.terminal_test(state):
+            continue
+        _, n = alpha_beta_cutoff_search(game, state, args.depth, eval_fn=offensive_heuristic_2)
+        nodes += n
+    dt = time.perf_counter() - t0
+    print("{} positions at depth {}: {} nodes, {:.2f}s, {:.0f} nodes/s".format(
+        len(states), args.depth, nodes, dt, nodes / dt
+    ))
+
+
+class CountingBreakthrough(Breakthrough):
+    """Breakthrough that counts the moves its move generator produces. With
+    eager=True every node materializes its full move list up front."""
+
+    def __init__(self, eager=False):
+        super().__init__()
+        self.eager = eager
+        self.generated = 0
+
+    def iter_actions(self, state):
+        if self.eager:
+            moves = list(super().iter_actions(state))
+            self.generated += len(moves)
+            yield from moves
+            return
+        for move in super().iter_actions(state):
+            self.generated += 1
+            yield move
+
+
+def bench_movegen(args):
+    """Compare moves generated per node by eager and lazy move generation."""
+    positions = random_states(Breakthrough(), args.states, args.seed)
+    positions = positions[:: max(args.states // 20, 1)]
+    for eager in (True, False):
+        game = CountingBreakthrough(eager=eager)
+        random.seed(args.seed)
+        nodes = 0
+        t0 = time.perf_counter()
+        for state in positions:
+            if game.terminal_test(state):
+                continue
+            _, n = alpha_beta_cutoff_search(game, state, args.depth, eval_fn=offensive_heuristic_2)
+            nodes += n
+        dt = time.perf_counter() - t0
+        print("{}: {} nodes, {:.1f} moves generated per node, {:.2f}s".format(
+            "eager" if eager else "lazy", nodes, game.generated / nodes, dt
+        ))
+
+
+def bench_reductions(args):
+    """Compare nodes and time of plain, LMR and null-move alpha-beta searches."""
+    game = Breakthrough()
+    positions = random_states(game, args.states, args.seed)
+    positions = [s for s in positions[:: max(args.states // 20, 1)] if not game.terminal_test(s)]
+    for name, options in (
+        ("plain", {}),
+        ("lmr", {"lmr": True}),
+        ("null-move", {"null_move": True}),
+        ("lmr+null-move", {"lmr": True, "null_move": True}),
+    ):
+        random.seed(args.seed)
+        nodes = 0
+        t0 = time.perf_counter()
+        for state in positions:
+            _, n = alpha_beta_cutoff_search(
+                game, state, args.depth, eval_fn=offensive_heuristic_2, **options
+            )
+            nodes += n
+        dt = time.perf_counter() - t0
+        print("{:>14}: {:>9} nodes, {:.2f}s".format(name, nodes, dt))
+
+
+def bench_imports(args):
+    """Time spawning short-lived Python processes that import each module."""
+    for statement in (
+        "pass",
+        "import breakthrough_engine",
+        "import breakthrough",
+        "import breakthrough_agent",
+        "import run_matches",
+        "import breakthrough_gui",
+    ):
+        t0 = time.perf_counter()
+        for _ in range(args.spawns):
+            subprocess.run([sys.executable, "-c", statement], check=True)
+        dt = (time.perf_counter() - t0) / args.spawns
+        print("{:>28}: {:.1f} ms per process".format(statement, dt * 1000))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Engine micro-benchmarks.")
+    parser.add_argument("--states", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--spawns", type=int, default=20)
+    sub = parser.add_subparsers(dest="bench", required=True)
+    sub.add_parser("memory", help=bench_memory.__doc__).set_defaults(func=bench_memory)
+    sub.add_parser("search", help=bench_search.__doc__).set_defaults(func=bench_search)
+    sub.add_parser("movegen", help=bench_movegen.__doc__).set_defaults(func=bench_movegen)
+    sub.add_parser("reductions", help=bench_reductions.__doc__).set_defaults(func=bench_reductions)
+    sub.add_parser("imports", help=bench_imports.__doc__).set_defaults(func=bench_imports)
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
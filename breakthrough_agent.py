@@ -1,108 +1,7 @@
 import time
 
-
-def minimax_cutoff_search(game, state, d=3, cutoff_test=None, eval_fn=None):
-    """Given a state in a game, calculate the best move by searching
-    forward all the way to the terminal states or reaching a cutoff
-    point. Return the action and number of nodes expanded."""
-
-    player = state.to_move
-    nodes = 0
-
-    def cutoff(state, depth):
-        return depth >= d or game.terminal_test(state)
-
-    def max_value(state, depth):
-        nonlocal nodes
-        nodes += 1
-        if cutoff(state, depth):
-            return eval_fn(state, player)
-        maxEval = -float("inf")
-
-        for action in game.actions(state):
-            maxEval = max(maxEval, min_value(game.result(state, action), depth + 1))
-        return maxEval
-
-    def min_value(state, depth):
-        nonlocal nodes
-        nodes += 1
-        if cutoff(state, depth):
-            return eval_fn(state, player)
-        minEval = float("inf")
-
-        for action in game.actions(state):
-            minEval = min(minEval, max_value(game.result(state, action), depth + 1))
-        return minEval
-
-    best_score = -float("inf")
-    best_action = None
-
-    for action in game.actions(state):
-        eval = min_value(game.result(state, action), 1)
-        if eval > best_score:
-            best_score = eval
-            best_action = action
-
-    return best_action, nodes
-
-
-def alpha_beta_cutoff_search(game, state, d=4, cutoff_test=None, eval_fn=None):
-    """Search game to determine best action; use alpha-beta pruning.
-    This version cuts off search and uses an evaluation function.
-    Return the action and number of nodes expanded."""
-
-    player = state.to_move
-    nodes = 0
-
-    def cutoff(state, depth):
-        return depth >= d or game.terminal_test(state)
-
-    def max_value(state, depth, alpha, beta):
-        nonlocal nodes
-        nodes += 1
-        if cutoff(state, depth):
-            return eval_fn(state, player)
-
-        maxEval = -float("inf")
-
-        for action in game.actions(state):
-            maxEval = max(
-                maxEval, min_value(game.result(state, action), depth + 1, alpha, beta)
-            )
-            if maxEval >= beta:
-                return maxEval
-            alpha = max(alpha, maxEval)
-        return maxEval
-
-    def min_value(state, depth, alpha, beta):
-        nonlocal nodes
-        nodes += 1
-        if cutoff(state, depth):
-            return eval_fn(state, player)
-        minEval = float("inf")
-
-        for action in game.actions(state):
-            minEval = min(
-                minEval, max_value(game.result(state, action), depth + 1, alpha, beta)
-            )
-            if minEval <= alpha:
-                return minEval
-            beta = min(beta, minEval)
-        return minEval
-
-    best_score = -float("inf")
-    best_action = None
-
-    alpha, beta = -float("inf"), float("inf")
-
-    for action in game.actions(state):
-        eval = min_value(game.result(state, action), 1, alpha, beta)
-        if eval > best_score:
-            best_score = eval
-            best_action = action
-        alpha = max(alpha, eval)
-
-    return best_action, nodes
+from breakthrough_engine import parse_move, state_to_str
+from breakthrough_engine import minimax_cutoff_search, alpha_beta_cutoff_search
 
 
 class BaseAgent:
@@ -138,15 +37,84 @@ class MinimaxAgent(BaseAgent):
 
 
 class AlphaBetaAgent(BaseAgent):
-    def __init__(self, name, depth=6, cutoff_test=None, eval_fn=None):
+    def __init__(self, name, depth=6, cutoff_test=None, eval_fn=None, lmr=False, null_move=False):
         super().__init__(name, depth, cutoff_test, eval_fn)
+        self.lmr = lmr
+        self.null_move = null_move
 
     def select_move(self, game, state):
         t0 = time.perf_counter()
         move, nodes = alpha_beta_cutoff_search(
-            game, state, self.depth, self.cutoff_test, self.eval_fn
+            game, state, self.depth, self.cutoff_test, self.eval_fn,
+            lmr=self.lmr, null_move=self.null_move,
         )
         dt = time.perf_counter() - t0
         self.time_per_move.append(dt)
         self.nodes_per_move.append(nodes)
         return move
+
+
+class RemoteAgent(BaseAgent):
+    """Agent that asks a running engine_server for its moves over TCP.
+    The heuristic is sent by name, so eval_fn must be one of the engine's
+    HEURISTICS. If movetime (in milliseconds) is given the server searches
+    until it runs out, otherwise to the given depth."""
+
+    def __init__(self, name, depth=6, cutoff_test=None, eval_fn=None,
+                 host="127.0.0.1", port=7878, movetime=None):
+        super().__init__(name, depth, cutoff_test, eval_fn)
+        self.host = host
+        self.port = port
+        self.movetime = movetime
+        self._conn = None
+
+    def __getstate__(self):
+        # connections are per process; reconnect after pickling
+        state = dict(self.__dict__)
+        state["_conn"] = None
+        return state
+
+    def _send(self, line):
+        if self._conn is None:
+            import socket
+
+            self._conn = socket.create_connection((self.host, self.port)).makefile("rw")
+        self._conn.write(line + "\n")
+        self._conn.flush()
+
+    def select_move(self, game, state):
+        t0 = time.perf_counter()
+        if self.eval_fn is not None:
+            self._send("eval " + self.eval_fn.__name__)
+        self._send("position board " + state_to_str(state))
+        if self.movetime is not None:
+            self._send("go movetime {}".format(self.movetime))
+        else:
+            self._send("go depth {}".format(self.depth))
+
+        move, nodes = None, 0
+        while True:
+            line = self._conn.readline()
+            if not line:
+                self.close()
+                raise ConnectionError("engine server closed the connection")
+            words = line.split()
+            if words[0] == "error":
+                # the server may still be running the go sent above; drop the
+                # connection so its output cannot answer a later request
+                self.close()
+                raise RuntimeError("engine server: " + line.strip())
+            elif words[0] == "info":
+                nodes += int(words[words.index("nodes") + 1])
+            elif words[0] == "bestmove":
+                move = None if words[1] == "none" else parse_move(words[1])
+                break
+        dt = time.perf_counter() - t0
+        self.time_per_move.append(dt)
+        self.nodes_per_move.append(nodes)
+        return move
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,524 @@
+"""The Breakthrough game, its heuristics and the search functions.
+
+This module only imports the standard library, so worker processes, tests
+and engine instances can load it quickly. Optional dependencies (tqdm,
+pygame) are imported lazily by the modules that use them.
+"""
+import random
+from collections import namedtuple
+from itertools import chain
+
+from breakthrough_const import WHITE, BLACK, EMPTY
+from games import Game
+
+
+WHITE_CELL, BLACK_CELL, EMPTY_CELL = b"W"[0], b"B"[0], b"."[0]
+
+MOVES = {
+    WHITE_CELL: ((-1, 0), (-1, 1), (-1, -1)),  # White moves UP (negative row)
+    BLACK_CELL: ((1, 0), (1, -1), (1, 1)),  # Black moves DOWN (positive row)
+}
+
+
+class BreakthroughState(
+    namedtuple("BreakthroughState", "to_move, board, white_captures, black_captures")
+):
+    """An immutable Breakthrough position. The board is a 64 byte bytes object
+    in row-major order holding b"W", b"B" or b"." for each cell, and
+    white_captures / black_captures count the white and black pieces that
+    have been captured so far."""
+
+    __slots__ = ()
+
+
+def _neighbors(dr, dcs):
+    """For every square index, the indices of the on-board squares dr rows
+    away and dc columns across for each dc in dcs."""
+    table = []
+    for i in range(64):
+        r, c = divmod(i, 8)
+        table.append(tuple(
+            (r + dr) * 8 + c + dc
+            for dc in dcs
+            if 0 <= r + dr < 8 and 0 <= c + dc < 8
+        ))
+    return tuple(table)
+
+
+def _move_table(piece):
+    """For every square index, the (target index, is diagonal, move) triples
+    a piece of this color could play from there."""
+    table = []
+    for i in range(64):
+        r, c = divmod(i, 8)
+        table.append(tuple(
+            ((r + dr) * 8 + c + dc, dc != 0, ((r, c), (r + dr, c + dc)))
+            for dr, dc in MOVES[piece]
+            if 0 <= r + dr < 8 and 0 <= c + dc < 8
+        ))
+    return tuple(table)
+
+
+MOVE_TABLE = {piece: _move_table(piece) for piece in MOVES}
+DIAGONALS = {dr: _neighbors(dr, (-1, 1)) for dr in (-1, 1)}
+AHEAD = {dr: _neighbors(dr, (-1, 0, 1)) for dr in (-1, 1)}
+
+
+def _squares(board, piece, start=0, end=64):
+    """Return the indices of the squares between start and end holding piece."""
+    squares = []
+    i = board.find(piece, start, end)
+    while i != -1:
+        squares.append(i)
+        i = board.find(piece, i + 1, end)
+    return squares
+
+
+FILES = "abcdefgh"
+
+
+def square_name(pos):
+    """Name a (row, col) square in algebraic notation, white's home row being rank 1."""
+    r, c = pos
+    return FILES[c] + str(8 - r)
+
+
+def parse_square(name):
+    """Return the (row, col) square of an algebraic name such as "a2"."""
+    if len(name) != 2 or name[0] not in FILES or name[1] not in "12345678":
+        raise ValueError("invalid square: {!r}".format(name))
+    return 8 - int(name[1]), FILES.index(name[0])
+
+
+def move_to_str(move, capture=False):
+    """Write a move as "a2-a3", or "a2xb3" for a capture."""
+    return square_name(move[0]) + ("x" if capture else "-") + square_name(move[1])
+
+
+def parse_move(text):
+    """Parse a move written as "a2-a3", "a2xb3" or "a2a3"."""
+    text = text.strip()
+    if len(text) == 5 and text[2] in "-x":
+        text = text[:2] + text[3:]
+    if len(text) != 4:
+        raise ValueError("invalid move: {!r}".format(text))
+    return parse_square(text[:2]), parse_square(text[2:])
+
+
+def state_to_str(state):
+    """Write a state as its ranks from black's home row down, separated by
+    "/", followed by the side to move, e.g. "BBBBBBBB/.../WWWWWWWW w"."""
+    board = state.board.decode()
+    ranks = "/".join(board[r * 8:r * 8 + 8] for r in range(8))
+    return ranks + (" w" if state.to_move == WHITE else " b")
+
+
+def parse_state(text):
+    """Parse a state written by state_to_str. Capture counts are inferred
+    from the number of pieces left of each color."""
+    try:
+        ranks, side = text.split()
+    except ValueError:
+        raise ValueError("invalid position: {!r}".format(text)) from None
+    board = ranks.replace("/", "").encode()
+    if len(board) != 64 or board.translate(None, b"WB.") or side not in ("w", "b"):
+        raise ValueError("invalid position: {!r}".format(text))
+    return BreakthroughState(
+        to_move=WHITE if side == "w" else BLACK,
+        board=board,
+        white_captures=16 - board.count(WHITE_CELL),
+        black_captures=16 - board.count(BLACK_CELL),
+    )
+
+
+class Breakthrough(Game):
+    def __init__(self):
+        board = b"B" * 16 + b"." * 32 + b"W" * 16
+
+        self.h, self.v = 8, 8
+        self.initial = BreakthroughState(
+            to_move=WHITE, board=board, white_captures=0, black_captures=0
+        )
+
+    def actions(self, state):
+        return list(self.iter_actions(state))
+
+    def iter_actions(self, state):
+        """Generate the legal moves lazily in stages: winning moves, then
+        captures, then quiet moves. Each stage is only generated once the
+        consumer asks for a move past the previous one."""
+        board = state.board
+        if state.to_move == WHITE:
+            piece, opposite_piece, last_row = WHITE_CELL, BLACK_CELL, 8
+        else:
+            piece, opposite_piece, last_row = BLACK_CELL, WHITE_CELL, 48
+        move_table = MOVE_TABLE[piece]
+
+        # every move from the row before the goal row wins
+        for i in _squares(board, piece, last_row, last_row + 8):
+            for j, diagonal, move in move_table[i]:
+                target = board[j]
+                if target == EMPTY_CELL or (diagonal and target != piece):
+                    yield move
+
+        squares = [
+            i for i in _squares(board, piece) if not last_row <= i < last_row + 8
+        ]
+
+        # can move diagonal onto an opposite piece
+        for i in squares:
+            for j, diagonal, move in move_table[i]:
+                if diagonal and board[j] == opposite_piece:
+                    yield move
+
+        # moving forward or diagonal onto an empty square
+        for i in squares:
+            for j, diagonal, move in move_table[i]:
+                if board[j] == EMPTY_CELL:
+                    yield move
+
+    def result(self, state, move):
+        ((r, c), (nr, nc)) = move
+        board = bytearray(state.board)
+        old, new = r * 8 + c, nr * 8 + nc
+
+        # remove old location and add new location
+        captured_piece = board[new]
+        board[new] = board[old]
+        board[old] = EMPTY_CELL
+
+        return BreakthroughState(
+            to_move=(BLACK if state.to_move == WHITE else WHITE),
+            board=bytes(board),
+            white_captures=state.white_captures + (captured_piece == WHITE_CELL),
+            black_captures=state.black_captures + (captured_piece == BLACK_CELL),
+        )
+
+    def is_capture(self, state, move):
+        """Return True if move takes an opposite piece."""
+        (_, (nr, nc)) = move
+        return state.board[nr * 8 + nc] != EMPTY_CELL
+
+    def is_quiet(self, state, move):
+        """Return True if move neither captures nor reaches the goal row."""
+        (_, (nr, nc)) = move
+        return 0 < nr < 7 and state.board[nr * 8 + nc] == EMPTY_CELL
+
+    def null_result(self, state):
+        """Return the state after the side to move passes (a null move)."""
+        return state._replace(to_move=(BLACK if state.to_move == WHITE else WHITE))
+
+    def utility(self, state, player):
+        """Return the value of this final state to player."""
+        board = state.board
+
+        # check if any piece reached opposite side
+        if board.find(WHITE_CELL, 0, 8) != -1:
+            return 1 if player == WHITE else -1
+        elif board.find(BLACK_CELL, 56) != -1:
+            return 1 if player == BLACK else -1
+
+        if board.find(WHITE_CELL) == -1:
+            return 1 if player == BLACK else -1
+        elif board.find(BLACK_CELL) == -1:
+            return 1 if player == WHITE else -1
+
+        # game not over
+        return 0
+
+    def terminal_test(self, state):
+        """Return True if this is a final state for the game."""
+        return (
+            self.utility(state, state.to_move) != 0
+            or next(self.iter_actions(state), None) is None
+        )
+
+    def display(self, state):
+        board = state.board.decode()
+        print("\n  1 2 3 4 5 6 7 8")
+        for r in range(8):
+            print(r + 1, " ".join(board[r * 8:r * 8 + 8]), "")
+        print()
+
+    def get_piece(self, state, r, c):
+        piece = state.board[r * 8 + c]
+        return {WHITE_CELL: WHITE, BLACK_CELL: BLACK}.get(piece, EMPTY)
+
+
+def defensive_heuristic_1(state, player):
+    piece = WHITE_CELL if player == WHITE else BLACK_CELL
+    pieces_remaining = state.board.count(piece)
+
+    return 2 * (pieces_remaining) + random.random()
+
+
+def offensive_heuristic_1(state, player):
+    opposite_piece = BLACK_CELL if player == WHITE else WHITE_CELL
+    opposite_pieces_remaining = state.board.count(opposite_piece)
+
+    return 2 * (32 - opposite_pieces_remaining) + random.random()
+
+
+def defensive_heuristic_2(state, player):
+    board = state.board
+    piece = WHITE_CELL if player == WHITE else BLACK_CELL
+    opposite_piece = BLACK_CELL if player == WHITE else WHITE_CELL
+    direction = -1 if piece == WHITE_CELL else 1
+    behind = DIAGONALS[-direction]
+    ahead = AHEAD[direction]
+
+    pieces_remaining = 0
+    protected = 0
+    back_line_defense = 0
+    enemy_near_goal = 0
+    enemy_threats = 0
+
+    for i in _squares(board, piece):
+        r = i >> 3
+        pieces_remaining += 1
+
+        # piece diagonal to same piece in case of capture
+        for j in behind[i]:
+            if board[j] == piece:
+                protected += 1
+
+        # more pieces in back rows for defence
+        if (piece == WHITE_CELL and r >= 6) or (piece == BLACK_CELL and r <= 1):
+            back_line_defense += 1
+
+    for i in _squares(board, opposite_piece):
+        r = i >> 3
+        # oppsite pieces are close to wining
+        if (piece == WHITE_CELL and r >= 5) or (piece == BLACK_CELL and r <= 3):
+            enemy_near_goal += 1
+
+        # opposite pieces are close to pieces
+        for j in ahead[i]:
+            if board[j] == piece:
+                enemy_threats += 1
+
+    return (
+        4 * pieces_remaining + 5 * protected - 7 * enemy_near_goal - 5 * enemy_threats + 10 * back_line_defense + random.random() * 0.01
+    )
+
+
+def offensive_heuristic_2(state, player):
+    board = state.board
+    piece = WHITE_CELL if player == WHITE else BLACK_CELL
+    opposite_piece = BLACK_CELL if player == WHITE else WHITE_CELL
+    direction = -1 if piece == WHITE_CELL else 1
+    diagonals = DIAGONALS[direction]
+
+    advancement, captures = 0, 0
+
+    for i in _squares(board, piece):
+        # rewarded for moving forward
+        if piece == WHITE_CELL:
+            advancement += 7 - (i >> 3)
+        else:
+            advancement += i >> 3
+
+        # rewards for capturing pieces
+        for j in diagonals[i]:
+            if board[j] == opposite_piece:
+                captures += 1
+
+    enemy_count = board.count(opposite_piece)
+
+    return (
+        2 * (32 - enemy_count) + 2 * advancement + 4 * captures + random.random() * 0.01
+    )
+
+
+HEURISTICS = {
+    fn.__name__: fn
+    for fn in (
+        offensive_heuristic_1,
+        defensive_heuristic_1,
+        offensive_heuristic_2,
+        defensive_heuristic_2,
+    )
+}
+
+
+def minimax_cutoff_search(game, state, d=3, cutoff_test=None, eval_fn=None):
+    """Given a state in a game, calculate the best move by searching
+    forward all the way to the terminal states or reaching a cutoff
+    point. Return the action and number of nodes expanded."""
+
+    player = state.to_move
+    nodes = 0
+
+    def cutoff(state, depth):
+        return depth >= d or game.terminal_test(state)
+
+    def max_value(state, depth):
+        nonlocal nodes
+        nodes += 1
+        if cutoff(state, depth):
+            return eval_fn(state, player)
+        maxEval = -float("inf")
+
+        for action in game.iter_actions(state):
+            maxEval = max(maxEval, min_value(game.result(state, action), depth + 1))
+        return maxEval
+
+    def min_value(state, depth):
+        nonlocal nodes
+        nodes += 1
+        if cutoff(state, depth):
+            return eval_fn(state, player)
+        minEval = float("inf")
+
+        for action in game.iter_actions(state):
+            minEval = min(minEval, max_value(game.result(state, action), depth + 1))
+        return minEval
+
+    best_score = -float("inf")
+    best_action = None
+
+    for action in game.iter_actions(state):
+        eval = min_value(game.result(state, action), 1)
+        if eval > best_score:
+            best_score = eval
+            best_action = action
+
+    return best_action, nodes
+
+
+# Late-move reductions: after the first LMR_MOVES children, quiet moves at
+# nodes with at least LMR_DEPTH plies left are searched one ply shallower.
+LMR_MOVES = 3
+LMR_DEPTH = 3
+
+# Null-move pruning: a pass is searched NULL_MOVE_R plies shallower.
+NULL_MOVE_R = 2
+
+
+def alpha_beta_cutoff_search(game, state, d=4, cutoff_test=None, eval_fn=None, tt=None,
+                             lmr=False, null_move=False):
+    """Search game to determine best action; use alpha-beta pruning.
+    This version cuts off search and uses an evaluation function.
+    If tt is a dict, it maps states to the best action found there by
+    earlier searches; that action is tried first and the dict is updated.
+    lmr enables late-move reductions, re-searching at full depth any reduced
+    move that beats the window. null_move enables null-move pruning, where a
+    fail-high of the pass is only trusted after a reduced verification search
+    of the position itself, to guard against zugzwang.
+    Return the action and number of nodes expanded."""
+    action, _, nodes = alpha_beta_scored_search(
+        game, state, d, eval_fn=eval_fn, tt=tt, lmr=lmr, null_move=null_move
+    )
+    return action, nodes
+
+
+def alpha_beta_scored_search(game, state, d=4, eval_fn=None, tt=None, lmr=False,
+                             null_move=False, actions=None):
+    """Like alpha_beta_cutoff_search, but also return the score of the best
+    action for the side to move. If actions is given, only those actions are
+    searched at the root. Return the action, its score and the number of
+    nodes expanded."""
+
+    player = state.to_move
+    nodes = 0
+
+    def cutoff(state, depth):
+        return depth >= d or game.terminal_test(state)
+
+    def ordered_actions(state):
+        best = tt.get(state) if tt is not None else None
+        if best is None:
+            return game.iter_actions(state)
+        return chain((best,), (a for a in game.iter_actions(state) if a != best))
+
+    def reduce(state, action, i, depth):
+        return (
+            lmr
+            and i >= LMR_MOVES
+            and d - depth >= LMR_DEPTH
+            and game.is_quiet(state, action)
+        )
+
+    def max_value(state, depth, alpha, beta, null_ok=True):
+        nonlocal nodes
+        nodes += 1
+        if cutoff(state, depth):
+            return eval_fn(state, player)
+
+        if null_move and null_ok and d - depth > NULL_MOVE_R and beta < float("inf"):
+            # min_value only returns above beta if every reply stays above it
+            value = min_value(game.null_result(state), depth + 1 + NULL_MOVE_R, beta, beta, False)
+            if value > beta:
+                value = max_value(state, depth + NULL_MOVE_R, alpha, beta, False)
+                if value >= beta:
+                    return value
+
+        maxEval = -float("inf")
+        best_action = None
+
+        for i, action in enumerate(ordered_actions(state)):
+            child = game.result(state, action)
+            if reduce(state, action, i, depth):
+                value = min_value(child, depth + 2, alpha, beta)
+                if value > alpha:
+                    value = min_value(child, depth + 1, alpha, beta)
+            else:
+                value = min_value(child, depth + 1, alpha, beta)
+            if value > maxEval:
+                maxEval, best_action = value, action
+            if maxEval >= beta:
+                break
+            alpha = max(alpha, maxEval)
+        if tt is not None:
+            tt[state] = best_action
+        return maxEval
+
+    def min_value(state, depth, alpha, beta, null_ok=True):
+        nonlocal nodes
+        nodes += 1
+        if cutoff(state, depth):
+            return eval_fn(state, player)
+
+        if null_move and null_ok and d - depth > NULL_MOVE_R and alpha > -float("inf"):
+            # max_value only returns below alpha if every reply stays below it
+            value = max_value(game.null_result(state), depth + 1 + NULL_MOVE_R, alpha, alpha, False)
+            if value < alpha:
+                value = min_value(state, depth + NULL_MOVE_R, alpha, beta, False)
+                if value <= alpha:
+                    return value
+
+        minEval = float("inf")
+        best_action = None
+
+        for i, action in enumerate(ordered_actions(state)):
+            child = game.result(state, action)
+            if reduce(state, action, i, depth):
+                value = max_value(child, depth + 2, alpha, beta)
+                if value < beta:
+                    value = max_value(child, depth + 1, alpha, beta)
+            else:
+                value = max_value(child, depth + 1, alpha, beta)
+            if value < minEval:
+                minEval, best_action = value, action
+            if minEval <= alpha:
+                break
+            beta = min(beta, minEval)
+        if tt is not None:
+            tt[state] = best_action
+        return minEval
+
+    best_score = -float("inf")
+    best_action = None
+
+    alpha, beta = -float("inf"), float("inf")
+
+    for action in ordered_actions(state) if actions is None else actions:
+        eval = min_value(game.result(state, action), 1, alpha, beta)
+        if eval > best_score:
+            best_score = eval
+            best_action = action
+        alpha = max(alpha, eval)
+
+    if tt is not None and actions is None:
+        tt[state] = best_action
+    return best_action, best_score, nodes
@@ -1,11 +1,10 @@
 import sys
 
-import pygame
-import pygame.gfxdraw
-
-from breakthrough import Breakthrough
+from breakthrough_engine import Breakthrough
 from breakthrough_const import WHITE, BLACK
 
+pygame = None
+
 
 CELL = 64
 MARGIN = 40
@@ -15,6 +14,15 @@ BG_DARK = (185, 125, 80)
 BG_SEL = (118, 181, 197)
 
 
+def load_pygame():
+    """Import pygame on first use, so importing this module stays cheap."""
+    global pygame
+    if pygame is None:
+        import pygame
+        import pygame.gfxdraw
+    return pygame
+
+
 def draw_piece(surface, center, radius, base_color, ring_color):
     x, y = center
     pygame.gfxdraw.filled_circle(surface, x, y, radius, base_color)
@@ -35,6 +43,7 @@ def draw_piece(surface, center, radius, base_color, ring_color):
 
 
 def draw_board(screen, game, state, selected=None, highlighted=None):
+    load_pygame()
     screen.fill((240, 230, 220))
     for r in range(8):
         for c in range(8):
@@ -69,6 +78,7 @@ def draw_board(screen, game, state, selected=None, highlighted=None):
 
 
 def main(white_agent, black_agent):
+    load_pygame()
     pygame.init()
     screen = pygame.display.set_mode((W, H))
     pygame.display.set_caption("Breakthrough")
@@ -170,11 +180,12 @@ def main(white_agent, black_agent):
 
 
 if __name__ == "__main__":
-    from breakthrough_agent import MinimaxAgent, AlphaBetaAgent
-    from breakthrough import offensive_heuristic_1, defensive_heuristic_1
-    from breakthrough import offensive_heuristic_2, defensive_heuristic_2
+    from breakthrough_agent import MinimaxAgent, AlphaBetaAgent, RemoteAgent
+    from breakthrough_engine import offensive_heuristic_1, defensive_heuristic_1
+    from breakthrough_engine import offensive_heuristic_2, defensive_heuristic_2
 
     # white_agent = None # Setting agent to None will let human play.
+    # white_agent = RemoteAgent("Remote Off2", depth=5, eval_fn=offensive_heuristic_2) # Needs engine_server.py running.
     white_agent = AlphaBetaAgent("AlphaBeta Off1", depth=3, eval_fn=offensive_heuristic_1)
     black_agent = AlphaBetaAgent("AlphaBeta Def1", depth=3, eval_fn=defensive_heuristic_1)
 
@@ -0,0 +1,86 @@
+"""Text records of finished games.
+
+A record file holds any number of games. Each game is a block of header
+lines followed by a single line of numbered moves and a blank line:
+
+    [White "AlphaBeta Off2"]
+    [Black "AlphaBeta Def2"]
+    [Result "1-0"]
+    [Moves "3"]
+
+    1. a2-a3 h7-h6 2. a3-a4
+
+Moves are written with breakthrough_engine.move_to_str ("a2-a3", "a2xb3").
+The result is "1-0", "0-1", or "1/2-1/2" for a game play_game stopped at
+max_moves, which it returns with no winner.
+"""
+RESULTS = {"white": "1-0", "black": "0-1", None: "1/2-1/2"}
+
+
+def format_game(result, **headers):
+    """
+    Write a game recorded by play_game(..., record=True) as text.
+
+    :param result: The statistic returned by play_game, with "moves".
+    :param headers: Extra header tags to write, e.g. Round=3.
+    :return: The game record, ending with a blank line.
+    """
+    tags = {
+        "White": result["white_name"],
+        "Black": result["black_name"],
+        "Result": RESULTS[result["winner"]],
+        "Moves": result["total_moves"],
+    }
+    tags.update(headers)
+    lines = ['[{} "{}"]'.format(key, value) for key, value in tags.items()]
+
+    moves = result["moves"]
+    movetext = " ".join(
+        "{}. {}".format(i // 2 + 1, " ".join(moves[i:i + 2]))
+        for i in range(0, len(moves), 2)
+    )
+    return "\n".join(lines) + "\n\n" + movetext + "\n\n"
+
+
+class GameRecordWriter:
+    """Append games to a record file as they finish, so long runs can be
+    followed and nothing is lost if they are interrupted."""
+
+    def __init__(self, path, mode="a"):
+        self.file = open(path, mode)
+        self.games = 0
+
+    def write(self, result, **headers):
+        self.file.write(format_game(result, **headers))
+        self.file.flush()
+        self.games += 1
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_games(path):
+    """Yield each game of a record file as a dict of its headers, with the
+    list of move strings under "moves"."""
+    game = None
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("["):
+                if game is None:
+                    game = {"moves": []}
+                key, _, value = line[1:-1].partition(" ")
+                game[key] = value.strip('"')
+            elif line and game is not None:
+                game["moves"].extend(t for t in line.split() if not t.endswith("."))
+            elif not line and game is not None and game["moves"]:
+                yield game
+                game = None
+    if game is not None:
+        yield game
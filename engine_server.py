@@ -0,0 +1,274 @@
+"""Long-lived search engine speaking a line protocol over TCP or stdin/stdout.
+
+Commands, one per line:
+
+    position startpos [moves a2-a3 h7-h6 ...]
+    position board <ranks> <w|b> [moves ...]   (see breakthrough_engine.state_to_str)
+    eval <heuristic name>
+    go [depth N] [movetime MS]
+    stop
+    isready
+    quit
+
+"go" answers with "info depth D nodes N time MS move M" after each
+iteration and finally "bestmove M" (or "bestmove none"). "isready" answers
+"readyok". Errors are answered with "error <message>".
+
+All sessions share one transposition table and one evaluation cache per
+heuristic, so the caches stay warm between requests.
+"""
+import argparse
+import asyncio
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from breakthrough_engine import Breakthrough, move_to_str, parse_move, parse_state
+from breakthrough_engine import HEURISTICS, offensive_heuristic_2
+from breakthrough_engine import alpha_beta_cutoff_search
+
+
+MAX_DEPTH = 64
+
+# An entry keyed by a state takes about 350 bytes (the 64-byte board, the
+# state tuple, the key tuple and the dict slot), so a full table is ~70 MB.
+MAX_CACHE = 200000
+
+
+class SearchStopped(Exception):
+    """Raised inside a search that was stopped or ran out of time."""
+
+
+class Engine:
+    """Search state shared by all sessions of a server."""
+
+    def __init__(self, workers=None, max_cache=MAX_CACHE):
+        self.game = Breakthrough()
+        self.max_cache = max_cache
+        self.tts = {}
+        self.eval_caches = {}
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+
+    def _cache(self, caches, eval_fn):
+        return caches.setdefault(eval_fn.__name__, {})
+
+    def search(self, state, eval_fn, depth, movetime, stop_event, report):
+        """
+        Run an iterative deepening search. Blocks, so it is run in the executor.
+
+        :param state: The state to search from.
+        :param eval_fn: The heuristic to evaluate leaves with.
+        :param depth: The maximum depth, or None to search until stopped.
+        :param movetime: The time limit in milliseconds, or None.
+        :param stop_event: A threading.Event that aborts the search when set.
+        :param report: Called with an "info" line after each completed depth.
+        :return: The best move found, or None if there are no legal moves.
+        """
+        t0 = time.perf_counter()
+        deadline = None if movetime is None else t0 + movetime / 1000
+        tt = self._cache(self.tts, eval_fn)
+        cache = self._cache(self.eval_caches, eval_fn)
+        max_cache = self.max_cache
+
+        def evaluate(state, player):
+            if stop_event.is_set() or (deadline is not None and time.perf_counter() > deadline):
+                raise SearchStopped
+            key = (state, player)
+            value = cache.get(key)
+            if value is None:
+                # checked per new entry, not per search, as one long
+                # search can fill both; tt grows between evaluations
+                if len(cache) >= max_cache:
+                    cache.clear()
+                if len(tt) >= max_cache:
+                    tt.clear()
+                value = cache[key] = eval_fn(state, player)
+            return value
+
+        best_move = None
+        for d in range(1, (MAX_DEPTH if depth is None else depth) + 1):
+            try:
+                move, nodes = alpha_beta_cutoff_search(
+                    self.game, state, d, eval_fn=evaluate, tt=tt
+                )
+            except SearchStopped:
+                break
+            if move is None:
+                break
+            best_move = move
+            report("info depth {} nodes {} time {} move {}".format(
+                d, nodes, int((time.perf_counter() - t0) * 1000), move_to_str(move)
+            ))
+
+        if best_move is None:
+            # stopped before the first iteration finished
+            actions = self.game.actions(state)
+            if actions:
+                best_move = tt.get(state) if tt.get(state) in actions else actions[0]
+        return best_move
+
+
+class Session:
+    """One client of the engine: a current position and at most one running search."""
+
+    def __init__(self, engine, send):
+        self.engine = engine
+        self.send = send
+        self.state = engine.game.initial
+        self.eval_fn = offensive_heuristic_2
+        self.stop_event = threading.Event()
+        self.task = None
+
+    def searching(self):
+        return self.task is not None and not self.task.done()
+
+    def stop(self):
+        self.stop_event.set()
+
+    async def wait(self):
+        if self.task is not None:
+            await self.task
+
+    async def handle(self, line):
+        """Handle one command line. Return False when the session should end."""
+        words = line.split()
+        if not words:
+            return True
+        command, args = words[0], words[1:]
+        try:
+            if command == "quit":
+                self.stop()
+                return False
+            elif command == "stop":
+                self.stop()
+            elif command == "isready":
+                self.send("readyok")
+            elif command not in ("position", "eval", "go"):
+                raise ValueError("unknown command: {}".format(command))
+            elif self.searching():
+                raise ValueError("search in progress")
+            elif command == "position":
+                self.state = self._parse_position(args)
+            elif command == "eval":
+                if len(args) != 1 or args[0] not in HEURISTICS:
+                    raise ValueError("unknown heuristic: {}".format(" ".join(args)))
+                self.eval_fn = HEURISTICS[args[0]]
+            else:
+                self._go(args)
+        except ValueError as e:
+            self.send("error {}".format(e))
+        return True
+
+    def _parse_position(self, args):
+        game = self.engine.game
+        if args[:1] == ["startpos"]:
+            state, rest = game.initial, args[1:]
+        elif args[:1] == ["board"] and len(args) >= 3:
+            state, rest = parse_state(" ".join(args[1:3])), args[3:]
+        else:
+            raise ValueError("expected 'position startpos' or 'position board'")
+        if rest:
+            if rest[0] != "moves":
+                raise ValueError("expected 'moves', got {!r}".format(rest[0]))
+            for text in rest[1:]:
+                move = parse_move(text)
+                if move not in game.actions(state):
+                    raise ValueError("illegal move: {}".format(text))
+                state = game.result(state, move)
+        return state
+
+    def _go(self, args):
+        options = {"depth": None, "movetime": None}
+        for name, value in zip(args[::2], args[1::2]):
+            if name not in options:
+                raise ValueError("unknown go option: {}".format(name))
+            options[name] = int(value)
+        if len(args) % 2 or (options["depth"] is None and options["movetime"] is None):
+            raise ValueError("expected 'go depth N' and/or 'go movetime MS'")
+        if options["depth"] is not None and options["depth"] < 1:
+            raise ValueError("depth must be at least 1")
+        if options["movetime"] is not None and options["movetime"] < 0:
+            raise ValueError("movetime must not be negative")
+
+        loop = asyncio.get_running_loop()
+        self.stop_event = threading.Event()
+
+        def report(line):
+            loop.call_soon_threadsafe(self.send, line)
+
+        async def run():
+            move = await loop.run_in_executor(
+                self.engine.executor,
+                self.engine.search,
+                self.state,
+                self.eval_fn,
+                options["depth"],
+                options["movetime"],
+                self.stop_event,
+                report,
+            )
+            self.send("bestmove " + (move_to_str(move) if move else "none"))
+
+        self.task = asyncio.create_task(run())
+
+
+async def serve_tcp(engine, host, port):
+    async def client(reader, writer):
+        def send(line):
+            if not writer.is_closing():
+                writer.write((line + "\n").encode())
+
+        session = Session(engine, send)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line or not await session.handle(line.decode()):
+                    break
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            session.stop()
+            writer.close()
+
+    server = await asyncio.start_server(client, host, port)
+    print("Engine listening on {}:{}".format(host, port), file=sys.stderr, flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+async def serve_stdio(engine):
+    loop = asyncio.get_running_loop()
+    session = Session(engine, lambda line: print(line, flush=True))
+    while True:
+        line = await loop.run_in_executor(None, sys.stdin.readline)
+        if not line or not await session.handle(line):
+            break
+    await session.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Breakthrough search engine.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7878)
+    parser.add_argument("--stdio", action="store_true", help="talk over stdin/stdout")
+    parser.add_argument("--workers", type=int, default=None, help="concurrent searches")
+    parser.add_argument("--max-cache", type=int, default=MAX_CACHE,
+                        help="entries per transposition table and evaluation cache")
+    args = parser.parse_args()
+
+    engine = Engine(workers=args.workers, max_cache=args.max_cache)
+    try:
+        if args.stdio:
+            asyncio.run(serve_stdio(engine))
+        else:
+            asyncio.run(serve_tcp(engine, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        engine.executor.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    main()
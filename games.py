@@ -16,6 +16,11 @@ class Game:
         """Return a list of the allowable moves at this point."""
         raise NotImplementedError
 
+    def iter_actions(self, state):
+        """Return an iterator over the allowable moves at this point. Override
+        it to generate moves lazily, best candidates first."""
+        return iter(self.actions(state))
+
     def result(self, state, move):
         """Return the state that results from making a move from a state."""
         raise NotImplementedError
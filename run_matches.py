@@ -1,73 +1,309 @@
-from breakthrough import offensive_heuristic_1, defensive_heuristic_1
-from breakthrough import offensive_heuristic_2, defensive_heuristic_2
+import argparse
+import json
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from breakthrough_engine import offensive_heuristic_1, defensive_heuristic_1
+from breakthrough_engine import offensive_heuristic_2, defensive_heuristic_2
 from breakthrough import play_game
 from breakthrough_agent import MinimaxAgent, AlphaBetaAgent
+from breakthrough_record import GameRecordWriter
+
+
+def score_to_elo(score):
+    """Convert an expected score in (0, 1) to an Elo difference."""
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return -400 * math.log10(1 / score - 1)
+
+
+def elo_to_score(elo):
+    """Convert an Elo difference to the expected score of the stronger side."""
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+# Pseudo-count added to each pentanomial bin, so a one-sided record still
+# has a positive variance (and a finite LLR and error bar).
+PENTANOMIAL_PRIOR = 0.25
+
+# Score of agent_a per pair, indexed by the half points it scored (0 to 4).
+PAIR_SCORES = (0.0, 0.25, 0.5, 0.75, 1.0)
+
+
+def pentanomial_stats(pentanomial, prior=PENTANOMIAL_PRIOR):
+    """
+    Return the mean score per game and the variance of the per-pair score.
+
+    :param pentanomial: How many game pairs agent_a scored 0, 0.5, 1, 1.5
+        and 2 points in. Scoring the pairs rather than the games accounts for
+        the two games of a pair sharing a seed. Must hold at least one pair.
+    :param prior: Pseudo-count added to every bin for the variance only; the
+        mean is that of the pairs actually played.
+    """
+    pairs = sum(pentanomial)
+    mean = sum(n * x for n, x in zip(pentanomial, PAIR_SCORES)) / pairs
+    counts = [n + prior for n in pentanomial]
+    total = sum(counts)
+    prior_mean = sum(n * x for n, x in zip(counts, PAIR_SCORES)) / total
+    var = sum(n * (x - prior_mean) ** 2 for n, x in zip(counts, PAIR_SCORES)) / total
+    return mean, var
+
+
+def elo_estimate(pentanomial, z=1.96):
+    """
+    Estimate the Elo difference from the pentanomial record of a match.
+
+    :param pentanomial: The pair counts, as for pentanomial_stats.
+    :param z: Normal quantile of the error bar (1.96 is a 95% interval).
+    :return: The Elo difference and the half-width of its error bar.
+    """
+    pairs = sum(pentanomial)
+    if pairs == 0:
+        return 0.0, float("inf")
+    mean, var = pentanomial_stats(pentanomial)
+    stderr = math.sqrt(var / pairs)
+    low = score_to_elo(mean - z * stderr)
+    high = score_to_elo(mean + z * stderr)
+    return score_to_elo(mean), (high - low) / 2
+
+
+def sprt_llr(pentanomial, elo0, elo1):
+    """Log-likelihood ratio of H1 (elo1) against H0 (elo0), using the
+    normal approximation of the generalized SPRT over game pairs."""
+    pairs = sum(pentanomial)
+    if pairs == 0:
+        return 0.0
+    mean, var = pentanomial_stats(pentanomial)
+    s0, s1 = elo_to_score(elo0), elo_to_score(elo1)
+    return pairs * (s1 - s0) * (2 * mean - s0 - s1) / (2 * var)
+
+
+def sprt_bounds(alpha, beta):
+    """Return the lower and upper LLR bounds for error rates alpha and beta."""
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+
+def play_pair(agent_a, agent_b, seed, max_moves=400, record=False):
+    """
+    Play one game each way between two agents with the same random seed.
+
+    :return: The wins, draws and losses of agent_a over both games and the
+        two statistic dicts returned by play_game.
+    """
+    results = []
+    for white_agent, black_agent in ((agent_a, agent_b), (agent_b, agent_a)):
+        white_agent.reset()
+        black_agent.reset()
+        random.seed(seed)
+        results.append(
+            play_game(white_agent, black_agent, max_moves=max_moves, record=record)
+        )
+
+    wins = draws = losses = 0
+    for result, a_color in zip(results, ("white", "black")):
+        if result["winner"] is None:
+            draws += 1
+        elif result["winner"] == a_color:
+            wins += 1
+        else:
+            losses += 1
+    return wins, draws, losses, results
+
+
+def run_match(
+    agent_a,
+    agent_b,
+    pairs=50,
+    max_moves=400,
+    workers=None,
+    seed=0,
+    sprt=None,
+    report_every=5,
+    writer=None,
+):
+    """
+    Run a match of color-swapped game pairs between two agents in parallel.
+
+    :param agent_a: The agent under test.
+    :param agent_b: The reference agent.
+    :param pairs: The maximum number of game pairs to play.
+    :param max_moves: The maximum number of moves per game.
+    :param workers: The number of worker processes (defaults to the CPU count).
+    :param seed: The base random seed; pair i is played with seed + i.
+    :param sprt: Optional dict with elo0, elo1, alpha and beta. When given,
+        the match stops as soon as the test accepts either hypothesis.
+    :param report_every: Print a progress line every this many pairs.
+    :param writer: Optional GameRecordWriter that every finished game is
+        written to.
+    :return: A summary dict of the match from agent_a's point of view.
+    """
+    wins = draws = losses = 0
+    pentanomial = [0, 0, 0, 0, 0]
+    nodes = {agent_a.name: [], agent_b.name: []}
+    times = {agent_a.name: [], agent_b.name: []}
+    verdict = None
+    finished = 0
+    llr = 0.0
+    if sprt is not None:
+        lower, upper = sprt_bounds(sprt["alpha"], sprt["beta"])
+
+    t0 = time.perf_counter()
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        seeds = {
+            pool.submit(play_pair, agent_a, agent_b, seed + i, max_moves, writer is not None): seed + i
+            for i in range(pairs)
+        }
+        pending = set(seeds)
+        while pending and verdict is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pair_wins, pair_draws, pair_losses, results = future.result()
+                wins += pair_wins
+                draws += pair_draws
+                losses += pair_losses
+                pentanomial[2 * pair_wins + pair_draws] += 1
+                if writer is not None:
+                    for result in results:
+                        writer.write(result, Seed=seeds[future])
+                for result in results:
+                    for color in ("white", "black"):
+                        name = result[color + "_name"]
+                        nodes[name].append(result[color + "_nodes_per_move"])
+                        times[name].append(result[color + "_time_per_move"])
+                finished += 1
+
+            # judge the test once every pair that has finished is counted
+            if sprt is not None:
+                llr = sprt_llr(pentanomial, sprt["elo0"], sprt["elo1"])
+                if llr >= upper:
+                    verdict = "H1"
+                elif llr <= lower:
+                    verdict = "H0"
+
+            if finished // report_every > (finished - len(done)) // report_every or verdict or not pending:
+                elo, err = elo_estimate(pentanomial)
+                line = "{} vs {}: {} pairs, +{} ={} -{}, Elo {:+.1f} +/- {:.1f}".format(
+                    agent_a.name, agent_b.name, finished, wins, draws, losses, elo, err
+                )
+                if sprt is not None:
+                    line += ", LLR {:.2f} [{:.2f}, {:.2f}]".format(llr, lower, upper)
+                print(line, flush=True)
+    finally:
+        # pairs already handed to a worker cannot be cancelled, so stop the
+        # workers instead of waiting for games whose results are not needed
+        processes = list(pool._processes.values())
+        pool.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+
+    elo, err = elo_estimate(pentanomial)
+    summary = {
+        "agent": agent_a.name,
+        "opponent": agent_b.name,
+        "games": wins + draws + losses,
+        "wins": wins,
+        "draws": draws,
+        "losses": losses,
+        "pentanomial": pentanomial,
+        "elo": elo,
+        "elo_error": err,
+        "seconds": time.perf_counter() - t0,
+        "nodes_per_move": {k: sum(v) / len(v) for k, v in nodes.items() if v},
+        "time_per_move": {k: sum(v) / len(v) for k, v in times.items() if v},
+    }
+    if sprt is not None:
+        summary["sprt"] = dict(sprt, llr=llr, lower=lower, upper=upper, verdict=verdict)
+    return summary
 
 
 def main():
-    white_agent = MinimaxAgent("Minimax Off1", depth=4, eval_fn=offensive_heuristic_1)
-    black_agent = AlphaBetaAgent(
-        "AlphaBeta Off1", depth=5, eval_fn=offensive_heuristic_1
-    )
-    results = play_game(
-        white_agent, black_agent, max_moves=400, display=True, progress=True
-    )
-    print(results)
-
-    white_agent = AlphaBetaAgent(
-        "AlphaBeta Off2", depth=5, eval_fn=offensive_heuristic_2
-    )
-    black_agent = AlphaBetaAgent(
-        "AlphaBeta Def1", depth=5, eval_fn=defensive_heuristic_1
-    )
-    results = play_game(
-        white_agent, black_agent, max_moves=400, display=True, progress=True
-    )
-    print(results)
-
-    white_agent = AlphaBetaAgent(
-        "AlphaBeta Def2", depth=5, eval_fn=defensive_heuristic_2
-    )
-    black_agent = AlphaBetaAgent(
-        "AlphaBeta Off1", depth=5, eval_fn=offensive_heuristic_1
-    )
-    results = play_game(
-        white_agent, black_agent, max_moves=400, display=True, progress=True
-    )
-    print(results)
-
-    white_agent = AlphaBetaAgent(
-        "AlphaBeta Off2", depth=5, eval_fn=offensive_heuristic_2
-    )
-    black_agent = AlphaBetaAgent(
-        "AlphaBeta Off1", depth=5, eval_fn=offensive_heuristic_1
-    )
-    results = play_game(
-        white_agent, black_agent, max_moves=400, display=True, progress=True
-    )
-    print(results)
-
-    white_agent = AlphaBetaAgent(
-        "AlphaBeta Def2", depth=5, eval_fn=defensive_heuristic_2
-    )
-    black_agent = AlphaBetaAgent(
-        "AlphaBeta Def1", depth=5, eval_fn=defensive_heuristic_1
-    )
-    results = play_game(
-        white_agent, black_agent, max_moves=400, display=True, progress=True
-    )
-    print(results)
-
-    white_agent = AlphaBetaAgent(
-        "AlphaBeta Off2", depth=5, eval_fn=offensive_heuristic_2
-    )
-    black_agent = AlphaBetaAgent(
-        "AlphaBeta Def2", depth=5, eval_fn=defensive_heuristic_2
-    )
-    results = play_game(
-        white_agent, black_agent, max_moves=400, display=True, progress=True
-    )
-    print(results)
+    parser = argparse.ArgumentParser(description="Play Elo/SPRT matches between agents.")
+    parser.add_argument("--pairs", type=int, default=50, help="maximum game pairs per match")
+    parser.add_argument("--max-moves", type=int, default=400)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sprt", action="store_true", help="stop early with an SPRT")
+    parser.add_argument("--elo0", type=float, default=0.0)
+    parser.add_argument("--elo1", type=float, default=20.0)
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--beta", type=float, default=0.05)
+    parser.add_argument("--out", default="match_summary.json", help="summary file")
+    parser.add_argument("--records", default=None, help="append every game to this record file")
+    parser.add_argument("--reductions", action="store_true",
+                        help="test LMR and null-move against plain alpha-beta at the same depth")
+    parser.add_argument("--depth", type=int, default=4, help="search depth for --reductions")
+    args = parser.parse_args()
+
+    sprt = None
+    if args.sprt:
+        sprt = {"elo0": args.elo0, "elo1": args.elo1, "alpha": args.alpha, "beta": args.beta}
+
+    matches = [
+        (
+            AlphaBetaAgent("AlphaBeta Off1", depth=5, eval_fn=offensive_heuristic_1),
+            MinimaxAgent("Minimax Off1", depth=4, eval_fn=offensive_heuristic_1),
+        ),
+        (
+            AlphaBetaAgent("AlphaBeta Off2", depth=5, eval_fn=offensive_heuristic_2),
+            AlphaBetaAgent("AlphaBeta Def1", depth=5, eval_fn=defensive_heuristic_1),
+        ),
+        (
+            AlphaBetaAgent("AlphaBeta Def2", depth=5, eval_fn=defensive_heuristic_2),
+            AlphaBetaAgent("AlphaBeta Off1", depth=5, eval_fn=offensive_heuristic_1),
+        ),
+        (
+            AlphaBetaAgent("AlphaBeta Off2", depth=5, eval_fn=offensive_heuristic_2),
+            AlphaBetaAgent("AlphaBeta Off1", depth=5, eval_fn=offensive_heuristic_1),
+        ),
+        (
+            AlphaBetaAgent("AlphaBeta Def2", depth=5, eval_fn=defensive_heuristic_2),
+            AlphaBetaAgent("AlphaBeta Def1", depth=5, eval_fn=defensive_heuristic_1),
+        ),
+        (
+            AlphaBetaAgent("AlphaBeta Off2", depth=5, eval_fn=offensive_heuristic_2),
+            AlphaBetaAgent("AlphaBeta Def2", depth=5, eval_fn=defensive_heuristic_2),
+        ),
+    ]
+    if args.reductions:
+        d = args.depth
+        plain = AlphaBetaAgent("AlphaBeta d{}".format(d), depth=d, eval_fn=offensive_heuristic_2)
+        matches = [
+            (AlphaBetaAgent("LMR d{}".format(d), depth=d,
+                            eval_fn=offensive_heuristic_2, lmr=True), plain),
+            (AlphaBetaAgent("Null-move d{}".format(d), depth=d,
+                            eval_fn=offensive_heuristic_2, null_move=True), plain),
+            (AlphaBetaAgent("LMR+null-move d{}".format(d), depth=d,
+                            eval_fn=offensive_heuristic_2, lmr=True, null_move=True), plain),
+        ]
+
+    writer = GameRecordWriter(args.records) if args.records else None
+    summaries = []
+    for agent_a, agent_b in matches:
+        summaries.append(
+            run_match(
+                agent_a,
+                agent_b,
+                pairs=args.pairs,
+                max_moves=args.max_moves,
+                workers=args.workers,
+                seed=args.seed,
+                sprt=sprt,
+                writer=writer,
+            )
+        )
+        summary = summaries[-1]
+        print("  nodes/move: {}; time/move: {}".format(
+            ", ".join("{} {:.0f}".format(k, v) for k, v in summary["nodes_per_move"].items()),
+            ", ".join("{} {:.1f} ms".format(k, v * 1000) for k, v in summary["time_per_move"].items()),
+        ), flush=True)
+        with open(args.out, "w") as f:
+            json.dump(summaries, f, indent=2)
+    print("Summary written to", args.out)
+    if writer is not None:
+        writer.close()
+        print("{} games written to {}".format(writer.games, args.records))
 
 
 if __name__ == "__main__":